@@ -2,94 +2,230 @@
 
 from __future__ import annotations
 
-import json
+import mmap
+import os
 import random
+import sys
+import tempfile
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
-from flask import Flask, jsonify, render_template, request
+import msgpack
+import orjson
+from flask import Flask, Response, jsonify, render_template, request
+from flask_caching import Cache
 
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
 ORIGINAL_PATH = DATA_DIR / "original_openings.jsonl"
 GENERATED_PATH = DATA_DIR / "generated_openings.jsonl"
+OPENINGS_BIN_PATH = DATA_DIR / "openings.bin"
+DATASET_CACHE_PATH = DATA_DIR / "cache.msgpack"
+# Bump whenever the columns returned by load_datasets change so older caches are rebuilt.
+DATASET_CACHE_VERSION = 1
+QUIZ_CACHE_TIMEOUT = 900
+# A seeded payload covering all ~100 books is ~600 KB, so this caps the cache near 60 MB per process.
+QUIZ_CACHE_THRESHOLD = 100
+
+cache = Cache()
+
+
+def fits_int_limit(digits: str) -> bool:
+    """Whether int() can convert this many digits under the interpreter's string-conversion limit."""
+    limit = sys.get_int_max_str_digits()
+    return not limit or len(digits) <= limit
 
 
 def load_jsonl(path: Path) -> List[Dict]:
-    rows: List[Dict] = []
     if not path.exists():
-        return rows
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            rows.append(json.loads(line))
-    return rows
+        return []
+    return [orjson.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+
+
+def encode_openings(
+    originals: Dict[str, Dict], generated: Dict[str, Dict], common_ids: Iterable[str]
+) -> Tuple[bytes, Tuple[Tuple[int, int], ...], Tuple[Tuple[int, int], ...]]:
+    """Concatenate opening texts into one UTF-8 blob and return it with their (offset, length) spans."""
+    chunks: List[bytes] = []
+    original_spans: List[Tuple[int, int]] = []
+    gpt_spans: List[Tuple[int, int]] = []
+    offset = 0
+    for book_id in common_ids:
+        for text, spans in (
+            (originals[book_id]["original_opening"], original_spans),
+            (generated[book_id]["gpt_opening"], gpt_spans),
+        ):
+            encoded = text.encode("utf-8")
+            chunks.append(encoded)
+            spans.append((offset, len(encoded)))
+            offset += len(encoded)
+    return b"".join(chunks), tuple(original_spans), tuple(gpt_spans)
+
+
+def write_atomic(path: Path, payload: bytes) -> bool:
+    """Write via a unique temp file and os.replace; return False if the data dir is not writable."""
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=DATA_DIR, prefix=f"{path.name}.", suffix=".tmp")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.chmod(tmp_name, 0o644)
+        # Replace atomically so processes that already mapped the old file keep a consistent view.
+        os.replace(tmp_name, path)
+    except OSError:
+        Path(tmp_name).unlink(missing_ok=True)
+        return False
+    return True
+
+
+def map_openings() -> mmap.mmap | bytes:
+    with OPENINGS_BIN_PATH.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 
 def load_datasets() -> Dict:
     originals = {str(row["book_id"]): row for row in load_jsonl(ORIGINAL_PATH)}
     generated = {str(row["book_id"]): row for row in load_jsonl(GENERATED_PATH)}
-    common_ids = sorted(set(originals) & set(generated))
+    common_ids = tuple(sorted(set(originals) & set(generated)))
+    openings, original_spans, gpt_spans = encode_openings(originals, generated, common_ids)
+    # Keep only the columns the quiz reads, as parallel tuples indexed by position in common_ids.
     return {
-        "originals": originals,
-        "generated": generated,
+        "openings": openings,
         "common_ids": common_ids,
+        "book_ids": tuple(int(book_id) for book_id in common_ids),
+        "titles": tuple(originals[book_id]["title"] for book_id in common_ids),
+        "authors": tuple(originals[book_id]["author"] for book_id in common_ids),
+        "original_spans": original_spans,
+        "gpt_spans": gpt_spans,
     }
 
 
-def build_pair(book_id: str, originals: Dict[str, Dict], generated: Dict[str, Dict], rng: random.Random) -> Dict:
-    original = originals[book_id]
-    gpt = generated[book_id]
-    options = [
-        {"label": "Original", "text": original["original_opening"]},
-        {"label": "GPT", "text": gpt["gpt_opening"]},
-    ]
+def dataset_cache_is_fresh() -> bool:
+    if not DATASET_CACHE_PATH.exists() or not OPENINGS_BIN_PATH.exists():
+        return False
+    sources = [path.stat().st_mtime for path in (ORIGINAL_PATH, GENERATED_PATH) if path.exists()]
+    if not sources:
+        return False
+    return DATASET_CACHE_PATH.stat().st_mtime >= max(sources)
+
+
+def load_cached_datasets() -> Dict:
+    """Load the quiz columns from the msgpack cache, rebuilding it when stale or from an older version."""
+    data = None
+    if dataset_cache_is_fresh():
+        data = msgpack.unpackb(DATASET_CACHE_PATH.read_bytes(), use_list=False)
+        if data.pop("version", None) != DATASET_CACHE_VERSION:
+            data = None
+    if data is not None:
+        openings = map_openings()
+    else:
+        data = load_datasets()
+        openings = data.pop("openings")
+        # Only map the store once both files are on disk; otherwise serve the in-memory copy.
+        if write_atomic(OPENINGS_BIN_PATH, openings) and write_atomic(
+            DATASET_CACHE_PATH, msgpack.packb({"version": DATASET_CACHE_VERSION, **data})
+        ):
+            openings = map_openings()
+    # Titles and authors repeat across books, so intern them to share one string per value.
+    data["titles"] = tuple(map(sys.intern, data["titles"]))
+    data["authors"] = tuple(map(sys.intern, data["authors"]))
+    # Opening texts stay on disk and are sliced out of the mapped store when a pair is built.
+    data["openings"] = openings
+    return data
+
+
+def read_opening(data: Dict, span: Tuple[int, int]) -> str:
+    offset, length = span
+    return data["openings"][offset : offset + length].decode("utf-8")
+
+
+def build_pair(data: Dict, idx: int, rng: random.Random) -> Dict:
+    original_opt = {"label": "Original", "text": read_opening(data, data["original_spans"][idx])}
+    options = [original_opt, {"label": "GPT", "text": read_opening(data, data["gpt_spans"][idx])}]
     rng.shuffle(options)
-    labeled = []
-    for idx, option in enumerate(options):
-        labeled.append({"slot": "A" if idx == 0 else "B", **option})
-    correct_label = next(opt["slot"] for opt in labeled if opt["label"] == "Original")
+    options[0]["slot"] = "A"
+    options[1]["slot"] = "B"
     return {
-        "book_id": int(book_id),
-        "title": original["title"],
-        "author": original["author"],
-        "options": labeled,
-        "correct_label": correct_label,
+        "book_id": data["book_ids"][idx],
+        "title": data["titles"][idx],
+        "author": data["authors"][idx],
+        "options": options,
+        "correct_label": "A" if options[0] is original_opt else "B",
     }
 
 
-def sample_pairs(data: Dict, count: int, seed: int | None = None) -> List[Dict]:
+def sample_pairs(data: Dict, count: int, seed: int | None = None) -> Iterator[Dict]:
     rng = random.Random(seed)
-    ids = data["common_ids"]
-    if not ids:
+    total = len(data["common_ids"])
+    if not total:
         raise ValueError("No overlapping originals and generations. Run the generation script first.")
-    chosen = rng.sample(ids, min(count, len(ids)))
-    return [build_pair(book_id, data["originals"], data["generated"], rng) for book_id in chosen]
+    chosen = rng.sample(range(total), min(count, total))
+    # Validation and selection happen eagerly; pairs themselves are built as they are consumed.
+    return (build_pair(data, idx, rng) for idx in chosen)
+
+
+def iter_quiz_json(pairs: Iterable[Dict]) -> Iterator[bytes]:
+    yield b'{"pairs":['
+    for idx, pair in enumerate(pairs):
+        if idx:
+            yield b","
+        yield orjson.dumps(pair)
+    yield b"]}"
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
-    app.config["DATA_CACHE"] = load_datasets()
+    app.config["DATA_CACHE"] = load_cached_datasets()
+    cache.init_app(
+        app,
+        config={
+            "CACHE_TYPE": "SimpleCache",
+            "CACHE_DEFAULT_TIMEOUT": QUIZ_CACHE_TIMEOUT,
+            "CACHE_THRESHOLD": QUIZ_CACHE_THRESHOLD,
+        },
+    )
 
     @app.route("/")
     def index():
         return render_template("index.html")
 
+    def stream_quiz(pairs: int, seed: int | None) -> Iterator[bytes]:
+        return iter_quiz_json(sample_pairs(app.config["DATA_CACHE"], pairs, seed=seed))
+
+    # Seeded quizzes are deterministic, so their encoded bytes can be served from memory.
+    @cache.memoize()
+    def render_seeded_quiz(pairs: int, seed: int) -> bytes:
+        return b"".join(stream_quiz(pairs, seed))
+
     @app.route("/api/quiz")
     def api_quiz():
-        try:
-            pairs = int(request.args.get("pairs", 10))
-            seed_param = request.args.get("seed")
-            seed = int(seed_param) if seed_param is not None else None
-            if pairs <= 0:
-                raise ValueError
-        except ValueError:
+        pairs_param = request.args.get("pairs", "10")
+        if not pairs_param.isdecimal():
+            return jsonify({"error": "pairs must be a positive integer"}), 400
+        available = max(len(app.config["DATA_CACHE"]["common_ids"]), 1)
+        pairs_digits = pairs_param.lstrip("0") or "0"
+        # Too many digits for int() means far more pairs than exist, which clamps to the full quiz anyway.
+        pairs = int(pairs_digits) if fits_int_limit(pairs_digits) else available
+        if pairs <= 0:
             return jsonify({"error": "pairs must be a positive integer"}), 400
-        data = app.config["DATA_CACHE"]
+        # Requests past the available pairs return the same quiz, so share one cache key for them.
+        pairs = min(pairs, available)
+        seed_param = request.args.get("seed")
+        seed = None
+        if seed_param is not None:
+            seed_digits = seed_param.removeprefix("-")
+            if not seed_digits.isdecimal() or not fits_int_limit(seed_digits):
+                return jsonify({"error": "seed must be an integer"}), 400
+            seed = int(seed_param)
         try:
-            payload = sample_pairs(data, pairs, seed=seed)
+            body = stream_quiz(pairs, seed) if seed is None else render_seeded_quiz(pairs, seed)
         except ValueError as exc:
             return jsonify({"error": str(exc)}), 400
-        return jsonify({"pairs": payload})
+        return Response(body, mimetype="application/json")
 
     @app.route("/healthz")
     def healthz():
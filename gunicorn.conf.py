@@ -0,0 +1,6 @@
+"""Gunicorn settings for serving the quiz app."""
+
+wsgi_app = "app:app"
+
+# Load the dataset once in the master; forked workers share its pages copy-on-write.
+preload_app = True
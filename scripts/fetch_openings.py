@@ -9,6 +9,8 @@ Optionally, passages can be cleaned via GPT to strip metadata/TOCs.
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import functools
 import json
 import random
 import re
@@ -16,11 +18,14 @@ import sys
 import os
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from openai import OpenAI
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
@@ -29,8 +34,20 @@ OPENINGS_PATH = DATA_DIR / "original_openings.jsonl"
 DEFAULT_LIMIT = 100
 DEFAULT_WORDS = 500
 RAW_DEFAULT_WORDS = 1500
+DEFAULT_WORKERS = 16
 NO_TEXT_MARKER = "[no text extracted]"
 
+_NORM_RE = re.compile(r"[^a-z0-9]+")
+_WORDS_RE = re.compile(r"[A-Za-z']+")
+_ALPHA_RE = re.compile(r"[A-Za-z]+")
+_START_RE = re.compile(r"\*\*\* ?START OF (?:THIS|THE) PROJECT GUTENBERG EBOOK", re.IGNORECASE)
+_END_RE = re.compile(r"\*\*\* ?END OF (?:THIS|THE) PROJECT GUTENBERG EBOOK", re.IGNORECASE)
+_PARAGRAPH_BREAK_RE = re.compile(r"(?:\r?\n){2,}")
+
+# Shared across Gutendex calls and download threads so connections are reused.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.3)))
+
 
 # Famous authors with instructions to skip the obvious works.
 AUTHOR_CONFIG = [
@@ -82,7 +99,7 @@ class BookRecord:
 
 
 def normalized_title(value: str) -> str:
-    cleaned = re.sub(r"[^a-z0-9]+", " ", value.lower())
+    cleaned = _NORM_RE.sub(" ", value.lower())
     return " ".join(cleaned.split())
 
 
@@ -114,40 +131,30 @@ def best_text_url(formats: Dict[str, str]) -> Optional[str]:
 
 
 def strip_gutenberg_headers(text: str) -> str:
-    start_markers = [
-        "*** START OF THIS PROJECT GUTENBERG EBOOK",
-        "***START OF THE PROJECT GUTENBERG EBOOK",
-        "*** START OF THE PROJECT GUTENBERG EBOOK",
-    ]
-    end_markers = [
-        "*** END OF THIS PROJECT GUTENBERG EBOOK",
-        "***END OF THE PROJECT GUTENBERG EBOOK",
-        "*** END OF THE PROJECT GUTENBERG EBOOK",
-    ]
-    lower_text = text.lower()
-    start_index = 0
-    for marker in start_markers:
-        loc = lower_text.find(marker.lower())
-        if loc != -1:
-            start_index = loc + len(marker)
-            break
-    end_index = len(text)
-    for marker in end_markers:
-        loc = lower_text.find(marker.lower())
-        if loc != -1:
-            end_index = loc
-            break
+    start = _START_RE.search(text)
+    start_index = start.end() if start else 0
+    end = _END_RE.search(text, start_index)
+    end_index = end.start() if end else len(text)
     return text[start_index:end_index].strip()
 
 
+def iter_paragraphs(text: str) -> Iterator[str]:
+    """Yield raw paragraph slices lazily so callers can stop without splitting the whole book."""
+    start = 0
+    for match in _PARAGRAPH_BREAK_RE.finditer(text):
+        yield text[start : match.start()]
+        start = match.end()
+    yield text[start:]
+
+
 def extract_opening(text: str, max_words: int = DEFAULT_WORDS) -> str:
-    clean_text = text.replace("\r\n", "\n").strip()
-    paragraphs = [p.strip() for p in clean_text.split("\n\n") if p.strip()]
     selected: List[str] = []
     word_total = 0
-    for para in paragraphs:
-        words = para.split()
-        word_total += len(words)
+    for para in iter_paragraphs(text):
+        para = para.strip().replace("\r\n", "\n")
+        if not para:
+            continue
+        word_total += len(para.split())
         selected.append(para)
         if word_total >= max_words:
             break
@@ -203,7 +210,7 @@ def clean_with_llm(passage: str, client: OpenAI, target_words: int = DEFAULT_WOR
 def padded_description(subjects: Iterable[str]) -> str:
     tokens: List[str] = []
     for subject in subjects:
-        tokens.extend(re.findall(r"[A-Za-z']+", subject))
+        tokens.extend(_WORDS_RE.findall(subject))
     tokens = [token.lower() for token in tokens if token]
     default_words = ["literary", "fiction", "classic", "character", "driven", "story", "public", "domain", "novel", "themes"]
     while len(tokens) < 10:
@@ -211,13 +218,9 @@ def padded_description(subjects: Iterable[str]) -> str:
     return " ".join(tokens[:10])
 
 
-def author_matches(target: str, candidate: str) -> bool:
-    def tokens(name: str) -> set[str]:
-        return set(re.findall(r"[A-Za-z]+", name.lower()))
-
-    target_tokens = tokens(target)
-    candidate_tokens = tokens(candidate)
-    return target_tokens.issubset(candidate_tokens)
+@functools.lru_cache(maxsize=None)
+def name_tokens(name: str) -> frozenset[str]:
+    return frozenset(_ALPHA_RE.findall(name.lower()))
 
 
 def fetch_books(limit: int, seed: int) -> List[BookRecord]:
@@ -226,24 +229,26 @@ def fetch_books(limit: int, seed: int) -> List[BookRecord]:
     seen_titles = set()
     for config in AUTHOR_CONFIG:
         target = config.get("target", 3)
-        excluded = {normalized_title(title) for title in config.get("exclude", [])}
+        excluded = {normalized_title(title) for title in config.get("exclude", [])} - {""}
+        # Normalized titles are space-separated [a-z0-9] tokens, so word boundaries match whole-token runs.
+        excluded_re = re.compile(r"\b(?:" + "|".join(map(re.escape, excluded)) + r")\b") if excluded else None
         author_name = config["name"]
+        target_tokens = name_tokens(author_name)
         page_url = f"https://gutendex.com/books?search={requests.utils.quote(author_name)}"
         author_books: List[BookRecord] = []
         while page_url and len(author_books) < target:
-            resp = requests.get(page_url, timeout=20)
+            resp = SESSION.get(page_url, timeout=20)
             resp.raise_for_status()
             payload = resp.json()
             for book in payload.get("results", []):
                 if not book.get("languages") or "en" not in book["languages"]:
                     continue
-                if not any(author_matches(author_name, a["name"]) for a in book.get("authors", [])):
+                if not any(target_tokens.issubset(name_tokens(a["name"])) for a in book.get("authors", [])):
                     continue
                 title = book.get("title", "")
                 title_norm = normalized_title(title)
                 if (
-                    title_norm in excluded
-                    or any(title_norm.startswith(f"{ex} ") or f" {ex} " in title_norm or title_norm.endswith(f" {ex}") for ex in excluded)
+                    (excluded_re and excluded_re.search(title_norm))
                     or "index of the project gutenberg works" in title_norm
                     or title_norm.startswith("project gutenberg collection of")
                 ):
@@ -280,7 +285,7 @@ def fetch_books(limit: int, seed: int) -> List[BookRecord]:
 
 
 def fetch_opening_text(record: BookRecord, max_words: int) -> str:
-    resp = requests.get(record.download_url, timeout=30)
+    resp = SESSION.get(record.download_url, timeout=30)
     resp.raise_for_status()
     resp.encoding = resp.encoding or "utf-8"
     cleaned = strip_gutenberg_headers(resp.text)
@@ -297,11 +302,11 @@ def save_metadata(records: List[BookRecord]) -> None:
 
 def save_openings(records: List[BookRecord], openings: Dict[int, str]) -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with OPENINGS_PATH.open("w", encoding="utf-8") as f:
+    with OPENINGS_PATH.open("wb") as f:
         for record in records:
             payload = asdict(record)
             payload["original_opening"] = openings.get(record.book_id, "")
-            f.write(json.dumps(payload) + "\n")
+            f.write(orjson.dumps(payload) + b"\n")
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
@@ -310,6 +315,7 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument("--max-words", type=int, default=DEFAULT_WORDS, help="Approximate word count for openings.")
     parser.add_argument("--raw-words", type=int, default=RAW_DEFAULT_WORDS, help="Word budget to pull before cleaning.")
     parser.add_argument("--seed", type=int, default=42, help="Shuffle seed when trimming the list.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel downloads.")
     parser.add_argument("--clean-with-llm", action="store_true", help="Use GPT-5-nano to clean passages.")
     return parser.parse_args(argv)
 
@@ -332,14 +338,21 @@ def main(argv: Optional[List[str]] = None) -> None:
 
     openings: Dict[int, str] = {}
     print(f"Fetching openings for {len(records)} books...")
-    for record in tqdm(records, desc="Downloading texts"):
-        try:
-            fetch_words = args.raw_words if client else args.max_words
-            raw = fetch_opening_text(record, fetch_words)
-            openings[record.book_id] = clean_with_llm(raw, client, target_words=args.max_words) if client else raw
-        except Exception as exc:
-            print(f"Failed to fetch {record.title} ({record.book_id}): {exc}", file=sys.stderr)
-            openings[record.book_id] = ""
+    fetch_words = args.raw_words if client else args.max_words
+
+    def fetch_one(record: BookRecord) -> str:
+        raw = fetch_opening_text(record, fetch_words)
+        return clean_with_llm(raw, client, target_words=args.max_words) if client else raw
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(fetch_one, record): record for record in records}
+        for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Downloading texts"):
+            record = futures[future]
+            try:
+                openings[record.book_id] = future.result()
+            except Exception as exc:
+                print(f"Failed to fetch {record.title} ({record.book_id}): {exc}", file=sys.stderr)
+                openings[record.book_id] = ""
 
     save_openings(records, openings)
     print(f"Wrote metadata to {METADATA_PATH} and openings to {OPENINGS_PATH}")
@@ -3,13 +3,13 @@
 from __future__ import annotations
 
 import argparse
-import concurrent.futures
-import json
+import asyncio
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional
 
-from openai import OpenAI
+import orjson
+from openai import AsyncOpenAI
 from tqdm import tqdm
 
 
@@ -23,21 +23,18 @@ NO_TEXT_MARKER = "[no text extracted]"
 def load_originals() -> List[Dict]:
     if not ORIGINAL_PATH.exists():
         raise FileNotFoundError(f"Missing originals at {ORIGINAL_PATH}")
-    entries: List[Dict] = []
-    with ORIGINAL_PATH.open("r", encoding="utf-8") as f:
-        for line in f:
-            entries.append(json.loads(line))
-    return entries
+    return [orjson.loads(line) for line in ORIGINAL_PATH.read_bytes().splitlines() if line.strip()]
 
 
 def load_existing() -> Dict[str, Dict]:
     existing: Dict[str, Dict] = {}
     if not GENERATED_PATH.exists():
         return existing
-    with GENERATED_PATH.open("r", encoding="utf-8") as f:
-        for line in f:
-            record = json.loads(line)
-            existing[str(record["book_id"])] = record
+    for line in GENERATED_PATH.read_bytes().splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        existing[str(record["book_id"])] = record
     return existing
 
 
@@ -63,18 +60,18 @@ def build_prompt(entry: Dict) -> str:
     )
 
 
-def make_client() -> OpenAI:
+def make_client() -> AsyncOpenAI:
     api_key = os.getenv("OAI_RLHF")
     if not api_key:
         raise RuntimeError("OAI_RLHF environment variable is not set.")
-    return OpenAI(api_key=api_key)
+    return AsyncOpenAI(api_key=api_key)
 
 
 def write_records(records: List[Dict]) -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with GENERATED_PATH.open("w", encoding="utf-8") as f:
+    with GENERATED_PATH.open("wb") as f:
         for record in records:
-            f.write(json.dumps(record) + "\n")
+            f.write(orjson.dumps(record) + b"\n")
 
 
 def generate(max_records: Optional[int] = None, overwrite: bool = False, workers: int = 30) -> None:
@@ -86,10 +83,10 @@ def generate(max_records: Optional[int] = None, overwrite: bool = False, workers
     results: Dict[int, Dict] = {}
     pending: List[tuple[int, Dict]] = []
 
-    def run_one(entry: Dict) -> Dict:
+    async def run_one(entry: Dict) -> Dict:
         prompt = build_prompt(entry)
         try:
-            response = client.responses.create(
+            response = await client.responses.create(
                 model=MODEL_NAME,
                 input=[{"role": "user", "content": prompt}],
                 reasoning={"effort": "low"},
@@ -108,34 +105,42 @@ def generate(max_records: Optional[int] = None, overwrite: bool = False, workers
         }
 
     for idx, entry in enumerate(to_process):
-        key = str(entry["book_id"])
-        if not overwrite and key in existing_map:
-            results[idx] = existing_map[key]
-        else:
+        if overwrite or str(entry["book_id"]) not in existing_map:
             pending.append((idx, entry))
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {executor.submit(run_one, entry): idx for idx, entry in pending}
-        for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Generating pages"):
-            idx = futures[future]
-            results[idx] = future.result()
+    async def run_pending(sink: BinaryIO) -> None:
+        semaphore = asyncio.Semaphore(workers)
+        progress = tqdm(total=len(pending), desc="Generating pages")
 
-    ordered = [results[i] for i in range(len(to_process)) if i in results]
+        async def run_slot(idx: int, entry: Dict) -> None:
+            async with semaphore:
+                record = await run_one(entry)
+            results[idx] = record
+            # Persist each completion as it lands so an interrupted run keeps its progress.
+            sink.write(orjson.dumps(record) + b"\n")
+            sink.flush()
+            progress.update(1)
 
-    if not overwrite and len(to_process) < len(originals):
-        for entry in originals[len(to_process) :]:
-            key = str(entry["book_id"])
-            if key in existing_map:
-                ordered.append(existing_map[key])
+        try:
+            async with client:
+                await asyncio.gather(*(run_slot(idx, entry) for idx, entry in pending))
+        finally:
+            progress.close()
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with GENERATED_PATH.open("ab") as sink:
+        asyncio.run(run_pending(sink))
 
-    write_records(ordered)
+    # Appends already hold every new record; only an overwrite needs the stale copies dropped.
+    if overwrite:
+        write_records([results[i] for i in range(len(to_process)) if i in results])
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate GPT-5.1 first pages.")
     parser.add_argument("--max-records", type=int, help="Limit how many books to process.")
     parser.add_argument("--overwrite", action="store_true", help="Regenerate even if already present.")
-    parser.add_argument("--workers", type=int, default=30, help="Parallel workers for generation.")
+    parser.add_argument("--workers", type=int, default=30, help="Concurrent requests for generation.")
     return parser.parse_args(argv)
 
 
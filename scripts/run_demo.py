@@ -3,12 +3,13 @@
 from __future__ import annotations
 
 import argparse
-import json
 import random
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List
 
+import orjson
+
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 ORIGINAL_PATH = DATA_DIR / "original_openings.jsonl"
@@ -29,28 +30,26 @@ class Pair:
 def load_jsonl(path: Path) -> List[Dict]:
     if not path.exists():
         raise FileNotFoundError(f"Missing file: {path}")
-    rows: List[Dict] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            rows.append(json.loads(line))
-    return rows
+    return [orjson.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
 
 
 def build_pairs(count: int, seed: int | None) -> List[Pair]:
     originals = {str(row["book_id"]): row for row in load_jsonl(ORIGINAL_PATH)}
     generated = {str(row["book_id"]): row for row in load_jsonl(GENERATED_PATH)}
-    common_ids = sorted(
-        book_id
-        for book_id in set(originals.keys()) & set(generated.keys())
-        if originals[book_id].get("original_opening", "").strip() != NO_TEXT_MARKER
-        and generated[book_id].get("gpt_opening", "").strip() != NO_TEXT_MARKER
+    common_ids = tuple(
+        sorted(
+            book_id
+            for book_id in set(originals.keys()) & set(generated.keys())
+            if originals[book_id].get("original_opening", "").strip() != NO_TEXT_MARKER
+            and generated[book_id].get("gpt_opening", "").strip() != NO_TEXT_MARKER
+        )
     )
     if len(common_ids) < count:
         raise ValueError(f"Need {count} pairs but only {len(common_ids)} have generations.")
     rng = random.Random(seed)
-    chosen_ids = rng.sample(common_ids, count)
     pairs: List[Pair] = []
-    for book_id in chosen_ids:
+    for idx in rng.sample(range(len(common_ids)), count):
+        book_id = common_ids[idx]
         original_text = originals[book_id]["original_opening"]
         gpt_text = generated[book_id]["gpt_opening"]
         options = [